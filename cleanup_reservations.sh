@@ -18,6 +18,14 @@ fi
 
 # Run the cleanup command
 poetry run python manage.py cleanup_expired_reservations
+status=$?
 
-# Exit with the command's exit code
-exit $?
+# Drop processed Stripe event records past the redelivery window
+poetry run python manage.py prune_stripe_events
+prune_status=$?
+
+# Exit with the first failing command's exit code
+if [ $status -ne 0 ]; then
+    exit $status
+fi
+exit $prune_status
@@ -109,6 +109,11 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
         'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Reuse connections across requests instead of reconnecting each time
+        'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        # Required behind PgBouncer in transaction pooling mode
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('POSTGRES_PGBOUNCER', '').lower() in ('1', 'true', 'yes'),
     }
 }
 
@@ -228,6 +233,16 @@ CACHES = {
     }
 }
 
+# Background tasks (Django tasks framework)
+# Django ships no worker backend: ImmediateBackend runs each task inside the
+# request that enqueues it, and the webhook answers 500 when it fails so
+# Stripe retries. TASKS_BACKEND can point at a third-party worker backend
+TASKS = {
+    'default': {
+        'BACKEND': os.environ.get('TASKS_BACKEND', 'django.tasks.backends.immediate.ImmediateBackend'),
+    }
+}
+
 # Logging configuration
 LOGGING = {
     'version': 1,
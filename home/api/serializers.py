@@ -10,6 +10,30 @@ from home.models import Product, ProductStatus, ReservationStatus
 
 logger = logging.getLogger(__name__)
 
+# Rendition used for product listing images
+PRODUCT_IMAGE_RENDITION = 'fill-800x800'
+
+# Upper bound on distinct product IDs in a single basket request
+MAX_PRODUCT_IDS = 100
+
+
+def _validate_product_ids(value):
+    """
+    Deduplicate product IDs (keeping order) and cap their number.
+
+    Args:
+        value: List of product IDs from the request
+
+    Returns:
+        List of unique product IDs
+    """
+    product_ids = list(dict.fromkeys(value))
+    if len(product_ids) > MAX_PRODUCT_IDS:
+        raise serializers.ValidationError(
+            f"Ensure this field has no more than {MAX_PRODUCT_IDS} unique product IDs."
+        )
+    return product_ids
+
 
 class ProductSerializer(serializers.ModelSerializer):
     """
@@ -65,7 +89,7 @@ class ProductSerializer(serializers.ModelSerializer):
         if primary_image:
             try:
                 # Get or create a rendition for consistent sizing
-                rendition = primary_image.get_rendition('fill-800x800')
+                rendition = primary_image.get_rendition(PRODUCT_IMAGE_RENDITION)
                 return rendition.url
             except Exception as e:
                 logger.warning(f"Could not create rendition for product {obj.pk}: {e}")
@@ -91,12 +115,10 @@ class ProductSerializer(serializers.ModelSerializer):
         now = timezone.now()
 
         # Check for active pending reservation that hasn't expired
-        active_reservation = obj.reservations.filter(
+        return obj.reservations.filter(
             reservation__status=ReservationStatus.PENDING,
             reservation__expires_at__gt=now
-        ).select_related('reservation').first()
-
-        return active_reservation is not None
+        ).exists()
 
     def get_reserved_until(self, obj):
         """
@@ -114,14 +136,14 @@ class ProductSerializer(serializers.ModelSerializer):
 
         now = timezone.now()
 
-        # Get the active pending reservation
-        active_reservation = obj.reservations.filter(
+        # Get the expiry of the active pending reservation
+        expires_at = obj.reservations.filter(
             reservation__status=ReservationStatus.PENDING,
             reservation__expires_at__gt=now
-        ).select_related('reservation').first()
+        ).values_list('reservation__expires_at', flat=True).first()
 
-        if active_reservation:
-            return active_reservation.reservation.expires_at.isoformat()
+        if expires_at:
+            return expires_at.isoformat()
 
         return None
 
@@ -156,6 +178,9 @@ class CheckAvailabilityRequestSerializer(serializers.Serializer):
         allow_empty=False
     )
 
+    def validate_product_ids(self, value):
+        return _validate_product_ids(value)
+
 
 class ReserveBasketRequestSerializer(serializers.Serializer):
     """
@@ -174,6 +199,9 @@ class ReserveBasketRequestSerializer(serializers.Serializer):
     furgonetka_locker_id = serializers.CharField(required=False, allow_null=True)
     invoice_creation = serializers.BooleanField(required=False, default=False)
 
+    def validate_product_ids(self, value):
+        return _validate_product_ids(value)
+
 
 class UnavailableProductSerializer(serializers.Serializer):
     """Serializer for unavailable product details."""
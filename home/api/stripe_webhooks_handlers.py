@@ -7,10 +7,13 @@ Creates Transaction records for order tracking in admin.
 
 import logging
 import re
+from decimal import Decimal
+from functools import partial
 from typing import Any, List
 
 import stripe
 from django.conf import settings
+from django.db import transaction as db_transaction
 from django.utils.html import strip_tags
 
 from home.services import FurgonetkaService, StripeSync, ReservationService, BrevoService
@@ -104,13 +107,15 @@ def handle_checkout_completed(session: dict) -> None:
     1. Complete reservation (if exists)
     2. Mark products as sold
     3. Create Transaction record for admin tracking
-    4. Create Furgonetka shipping package
+    4. After commit: deactivate Stripe products, create Furgonetka shipping
+       package and send the confirmation email
+
+    Steps 1-3 are local writes and belong to the caller's transaction.
 
     Args:
         session: Stripe checkout session object (dict)
     """
     session_id = session.get("id")
-    payment_intent_id = session.get("payment_intent")
     metadata = session.get("metadata", {})
 
     # Extract customer details
@@ -120,15 +125,11 @@ def handle_checkout_completed(session: dict) -> None:
     shipping_address = customer["shipping_address"]
     shipping_method = _get_shipping_method(metadata)
 
-    # Get product IDs from reservation or metadata
-    product_ids = []
-
-    # First, try to complete the reservation if it exists
+    # Get product IDs from the reservation (basket checkout)
     reservation_result = ReservationService.complete_reservation(session_id)
+    product_ids = reservation_result.get("product_ids", [])
 
     if reservation_result["success"]:
-        # Reservation found and completed - get product IDs from it
-        product_ids = reservation_result.get("product_ids", [])
         logger.info(f"[Webhook] Completed reservation for session {session_id}")
     elif "not found" not in reservation_result.get("error", ""):
         # Log unexpected errors but don't fail the webhook
@@ -137,53 +138,38 @@ def handle_checkout_completed(session: dict) -> None:
             f"{reservation_result.get('error')}"
         )
 
-    # If no reservation, fall back to metadata (for single product checkout)
-    product_ids_str = metadata.get("product_ids")
+    # Single product checkout has no reservation, only metadata
     product_id_str = metadata.get("product_id")
-
     if not product_ids and product_id_str:
         product_ids = [int(product_id_str)]
-    elif not product_ids and product_ids_str:
-        product_ids = [int(pid) for pid in product_ids_str.split(",")]
 
     if not product_ids:
         logger.error(f"[Webhook] Checkout session {session_id} has no product IDs")
         return
 
-    # Get product objects and calculate total
+    # Get product objects in one query and calculate total
+    products_by_id = Product.objects.in_bulk(product_ids)
     products = []
-    total_amount = 0
+    total_amount = Decimal("0")
     for product_id in product_ids:
-        try:
-            product = Product.objects.get(pk=product_id)
-            products.append(product)
-            total_amount += float(product.cena) if product.cena else 0
-        except Product.DoesNotExist:
+        product = products_by_id.get(product_id)
+        if product is None:
             logger.error(f"[Webhook] Product {product_id} not found")
+            continue
+        products.append(product)
+        total_amount += product.cena or 0
 
     if not products:
         logger.error(f"[Webhook] No valid products found for session {session_id}")
         return
 
-    # Mark all products as sold
-    for product in products:
-        try:
-            # Set skip flag to prevent signal loop
-            product._skip_stripe_sync = True
-
-            # Mark product as sold
-            result = StripeSync.mark_as_sold(product)
-
-            if result["success"]:
-                logger.info(f"[Webhook] Product {product.id} marked as sold")
-            else:
-                logger.error(
-                    f"[Webhook] Failed to mark product {product.id} as sold: "
-                    f"{result.get('error')}"
-                )
+    # Mark all products as sold in a single UPDATE
+    result = StripeSync.mark_many_as_sold(products)
 
-        except Exception as e:
-            logger.exception(f"[Webhook] Error marking product {product.id} as sold: {e}")
+    if result["success"]:
+        logger.info(f"[Webhook] {result['updated']} product(s) marked as sold")
+    else:
+        logger.error(f"[Webhook] Failed to mark products as sold: {result.get('error')}")
 
     # Create Transaction record
     transaction, created = Transaction.objects.get_or_create(
@@ -205,6 +191,48 @@ def handle_checkout_completed(session: dict) -> None:
     else:
         logger.info(f"[Webhook] Transaction already exists for session {session_id}")
 
+    # Outbound calls (Stripe, Furgonetka, Brevo) wait until the local writes
+    # are committed, so no row locks are held across HTTP round-trips
+    db_transaction.on_commit(
+        partial(
+            _fulfil_order, session, transaction, products, total_amount,
+            customer, shipping_method
+        )
+    )
+
+
+def _fulfil_order(
+    session: dict,
+    transaction: Transaction,
+    products: List[Product],
+    total_amount: Decimal,
+    customer: dict,
+    shipping_method: str,
+) -> None:
+    """
+    Deactivate sold products in Stripe, create the Furgonetka package
+    and send the order confirmation email.
+
+    Runs after the checkout's local writes are committed. Failures are
+    logged and don't undo the order.
+
+    Args:
+        session: Stripe checkout session object (dict)
+        transaction: Transaction created for the session
+        products: Products sold in the session
+        total_amount: Order total
+        customer: Customer details from _extract_customer_details
+        shipping_method: Shipping method display name
+    """
+    session_id = session.get("id")
+    payment_intent_id = session.get("payment_intent")
+    metadata = session.get("metadata", {})
+    customer_email = customer["email"]
+    customer_name = customer["name"]
+    shipping_address = customer["shipping_address"]
+
+    StripeSync.deactivate_products(products)
+
     # Create Furgonetka package
     package_id = None
     tracking_number = None
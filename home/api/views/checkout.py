@@ -3,6 +3,7 @@ Checkout and reservation API views.
 """
 
 import logging
+import uuid
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
@@ -10,13 +11,14 @@ from rest_framework.response import Response
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.timezone import localtime
 
-from home.models import Product, Coupon
+from home.models import Product, ProductStatus, Coupon
 from home.api.serializers import (
     CheckoutRequestSerializer,
     CheckAvailabilityRequestSerializer,
     ReserveBasketRequestSerializer,
 )
 from home.services import StripeSync, ReservationService
+from home.services.reservation import NOT_FOUND_MESSAGE_PL
 
 logger = logging.getLogger(__name__)
 
@@ -60,17 +62,20 @@ def create_checkout(request):
     cancel_url = serializer.validated_data['cancel_url']
     customer_email = serializer.validated_data.get('customer_email')
 
-    # Get product
-    try:
-        product = Product.objects.get(pk=product_id)
-    except Product.DoesNotExist:
-        return Response(
-            {'error': 'Product not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+    # Get buyable product with only the columns needed for the Stripe session
+    product = (
+        Product.objects
+        .only('id', 'name', 'tytul', 'price', 'cena', 'stripe_price_id', 'stripe_product_id', 'status')
+        .filter(pk=product_id, status=ProductStatus.ACTIVE)
+        .first()
+    )
 
-    # Check if product is buyable
-    if not product.is_buyable:
+    if product is None:
+        if not Product.objects.filter(pk=product_id).exists():
+            return Response(
+                {'error': 'Product not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         return Response(
             {'error': 'Product is not available for purchase'},
             status=status.HTTP_404_NOT_FOUND
@@ -228,22 +233,43 @@ def reserve_basket(request):
     logger.info(f"[Reserve] Furgonetka params: service_id={furgonetka_service_id}, locker_id={furgonetka_locker_id}")
     logger.info(f"[Reserve] Invoice creation: {invoice_creation}")
 
-    # Validate product IDs exist
-    products = list(Product.objects.filter(pk__in=product_ids))
+    # Reservation is created before the Stripe session exists, so it starts
+    # with a provisional session ID that is replaced once Stripe responds
+    provisional_session_id = f"pending_{uuid.uuid4().hex}"
+
+    # Reject unknown IDs on PKs alone, before loading any full rows
+    found_ids = set(Product.objects.filter(pk__in=product_ids).values_list('pk', flat=True))
 
-    if len(products) != len(product_ids):
-        found_ids = {p.pk for p in products}
-        missing_ids = set(product_ids) - found_ids
+    if len(found_ids) != len(product_ids):
         unavailable = [
-            {'id': pid, 'reason': 'not_found', 'message': 'Produkt nie został znaleziony'}
-            for pid in missing_ids
+            {'id': pid, 'reason': 'not_found', 'message': NOT_FOUND_MESSAGE_PL}
+            for pid in product_ids if pid not in found_ids
         ]
         return Response({
             'success': False,
             'unavailable_products': unavailable
         }, status=status.HTTP_200_OK)
 
-    # First, create Stripe checkout session (lightweight operation)
+    # Full rows are needed for the Stripe session; availability is decided
+    # by the reservation's claim, not by this read
+    products = list(Product.objects.filter(pk__in=found_ids))
+
+    # Reserve first, so a lost race never costs a Stripe round-trip
+    reservation_result = ReservationService.reserve_products(
+        products=products,
+        stripe_session_id=provisional_session_id,
+        customer_email=customer_email
+    )
+
+    if not reservation_result['success']:
+        logger.warning(f"Basket reservation failed: {reservation_result.get('error')}")
+
+        unavailable = reservation_result.get('unavailable_products', [])
+        return Response({
+            'success': False,
+            'unavailable_products': unavailable
+        }, status=status.HTTP_200_OK)
+
     stripe_result = StripeSync.create_basket_checkout_session(
         products=products,
         success_url=success_url,
@@ -257,6 +283,8 @@ def reserve_basket(request):
 
     if not stripe_result['success']:
         logger.error(f"Stripe checkout creation failed: {stripe_result.get('error')}")
+        # Release the products reserved for this basket
+        ReservationService.cancel_reservation(provisional_session_id)
         return Response(
             {'success': False, 'error': 'Failed to create checkout session'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -264,26 +292,10 @@ def reserve_basket(request):
 
     stripe_session_id = stripe_result['session_id']
 
-    # Now reserve products with the session ID
-    reservation_result = ReservationService.reserve_products(
-        products=products,
-        stripe_session_id=stripe_session_id,
-        customer_email=customer_email
-    )
-
-    if not reservation_result['success']:
-        # Cancel the Stripe session since reservation failed
-        # Note: We can't actually cancel Stripe sessions, but they'll expire
-        logger.warning(
-            f"Stripe session {stripe_session_id} created but reservation failed: "
-            f"{reservation_result.get('error')}"
-        )
-
-        unavailable = reservation_result.get('unavailable_products', [])
-        return Response({
-            'success': False,
-            'unavailable_products': unavailable
-        }, status=status.HTTP_200_OK)
+    # Link reservation to the real Stripe session used by webhooks
+    reservation = reservation_result['reservation']
+    reservation.stripe_session_id = stripe_session_id
+    reservation.save(update_fields=['stripe_session_id'])
 
     # Success - return checkout URL
     expires_at = reservation_result['expires_at']
@@ -368,35 +380,25 @@ def cleanup_expired_reservations(request):
         "message": "Cancelled 5 expired reservation(s)"
     }
     """
-    from django.utils import timezone
-    from home.models import Reservation
+    result = ReservationService.cancel_expired_reservations()
 
-    now = timezone.now()
-
-    # Find pending/active reservations that have expired
-    expired_reservations = Reservation.objects.filter(
-        status__in=['pending', 'active'],
-        expires_at__lt=now
-    )
+    if not result['success']:
+        return Response(
+            {'success': False, 'error': result.get('error')},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
-    count = expired_reservations.count()
+    cancelled = result['cancelled']
 
-    if count == 0:
+    if cancelled == 0:
         return Response({
             'success': True,
             'cancelled': 0,
             'message': 'No expired reservations found'
         }, status=status.HTTP_200_OK)
 
-    # Cancel each expired reservation using the service
-    cancelled = 0
-    for reservation in expired_reservations:
-        result = ReservationService.cancel_reservation(reservation.stripe_session_id)
-        if result['success']:
-            cancelled += 1
-
     return Response({
         'success': True,
         'cancelled': cancelled,
-        'message': f'Cancelled {cancelled}/{count} expired reservation(s)'
+        'message': f'Cancelled {cancelled} expired reservation(s)'
     }, status=status.HTTP_200_OK)
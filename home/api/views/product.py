@@ -2,11 +2,18 @@
 Product API views.
 """
 
+from django.core.cache import cache
+from django.db.models import Count, Max, Prefetch
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from wagtail.images.models import Image
 
-from home.models import Product, ProductStatus
-from home.api.serializers import ProductSerializer
+from home.models import Product, ProductImage, ProductStatus
+from home.api.serializers import ProductSerializer, PRODUCT_IMAGE_RENDITION
+
+# Short TTL keeps cached listings bounded even if a change slips past the key
+PRODUCT_LIST_CACHE_TIMEOUT = 60
 
 
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
@@ -17,6 +24,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     - Default: only ACTIVE products
     - Query param ?status=sold returns sold products
     - Query param ?status=all returns all products
+    - List responses are cached per status filter and page
     """
     serializer_class = ProductSerializer
     lookup_field = 'slug'
@@ -31,7 +39,20 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
             - SOLD products if ?status=sold
             - All products if ?status=all
         """
-        queryset = Product.objects.prefetch_related('images__image')
+        # Load only the image columns needed to resolve the rendition URL,
+        # and prefetch the rendition itself to avoid a query per image
+        image_queryset = Image.objects.only(
+            'id', 'title', 'file', 'file_hash', 'width', 'height',
+            'focal_point_x', 'focal_point_y',
+            'focal_point_width', 'focal_point_height',
+        ).prefetch_renditions(PRODUCT_IMAGE_RENDITION)
+
+        # Explicit ordering matches Product.primary_image (images.first()),
+        # so it is served from the prefetch cache instead of re-querying
+        queryset = Product.objects.prefetch_related(
+            Prefetch('images', queryset=ProductImage.objects.order_by('pk')),
+            Prefetch('images__image', queryset=image_queryset),
+        )
         status_filter = self.request.query_params.get('status', 'active')
 
         if status_filter == 'sold':
@@ -40,3 +61,61 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
             return queryset.all()
         else:  # default to active
             return queryset.filter(status=ProductStatus.ACTIVE)
+
+    def list(self, request, *args, **kwargs):
+        """
+        List products, serving the serialized page from cache when possible.
+
+        The cache key includes the latest Product.updated_at and the product
+        count, so any product change or deletion produces a fresh key.
+        Only the parameters that shape the response go into the key, so
+        unknown or cache-busting parameters reuse the same entry.
+        """
+        state = Product.objects.aggregate(
+            last_updated=Max('updated_at'),
+            total=Count('pk'),
+        )
+        last_updated = state['last_updated'].timestamp() if state['last_updated'] else 0
+        cache_key = (
+            f"products:{self._list_cache_params()}:"
+            f"{last_updated}:{state['total']}"
+        )
+
+        data = cache.get(cache_key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(cache_key, data, PRODUCT_LIST_CACHE_TIMEOUT)
+
+        return Response(data)
+
+    def _list_cache_params(self):
+        """
+        Build the cache key fragment from the status filter and pagination
+        parameters, normalised the same way the view interprets them.
+        """
+        params = self.request.query_params
+        status_filter = params.get('status', 'active')
+        if status_filter not in ('sold', 'all'):
+            status_filter = 'active'
+
+        parts = [f"status={status_filter}"]
+        paginator = self.paginator
+        if paginator is not None:
+            for name in (paginator.page_query_param, paginator.page_size_query_param):
+                if name and params.get(name):
+                    parts.append(f"{name}={self._normalise_page_value(params[name])}")
+
+        return '&'.join(parts)
+
+    def _normalise_page_value(self, value):
+        """
+        Reduce a raw pagination value to a short, memcached-safe token.
+
+        Values the paginator would reject share one token; they either 404
+        (and are never cached) or fall back to the default page size.
+        """
+        if value in self.paginator.last_page_strings:
+            return value
+        if value.isascii() and value.isdigit() and len(value) <= 10:
+            return str(int(value))
+        return 'invalid'
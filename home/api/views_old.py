@@ -12,8 +12,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.db import models
 
 from django.utils import timezone
+from django.utils.timezone import localtime
 
-from home.models import Product, ProductStatus, Coupon
+from home.models import Product, ProductStatus, Coupon, Reservation
 from home.api.serializers import (
     ProductSerializer,
     CheckoutRequestSerializer,
@@ -316,7 +317,6 @@ def reserve_basket(request):
         }, status=status.HTTP_200_OK)
 
     # Success - return checkout URL
-    from django.utils.timezone import localtime
     expires_at = reservation_result['expires_at']
 
     return Response({
@@ -353,8 +353,6 @@ def cancel_checkout(request):
         "error": "Reservation not found"
     }
     """
-    from home.services import StripeSync, ReservationService
-
     session_id = request.data.get('session_id')
 
     if not session_id:
@@ -401,9 +399,6 @@ def cleanup_expired_reservations(request):
         "message": "Cancelled 5 expired reservation(s)"
     }
     """
-    from django.utils import timezone
-    from home.models import Reservation
-
     now = timezone.now()
 
     # Find pending/active reservations that have expired
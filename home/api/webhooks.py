@@ -5,8 +5,11 @@ Verifies signatures and routes events to appropriate handler functions.
 See stripe_webhooks_handlers.py for individual handler implementations.
 """
 
+import json
 import logging
+from django.db import transaction
 from django.http import JsonResponse
+from django.tasks import TaskResultStatus
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
@@ -14,14 +17,47 @@ from django.conf import settings
 import stripe
 
 from home.api.stripe_webhooks_handlers import (
-    handle_checkout_completed,
-    handle_checkout_expired,
     handle_coupon_updated,
     handle_promotion_code_updated,
 )
+from home.models import ProcessedStripeEvent
+from home.tasks import process_checkout_completed, process_checkout_expired
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import - the secret doesn't change while the process runs
+WEBHOOK_SECRET = getattr(settings, "STRIPE_WEBHOOK_SECRET", None)
+
+# Event types that trigger work and are deduplicated by event ID
+HANDLED_EVENT_TYPES = frozenset(
+    {
+        "checkout.session.completed",
+        "checkout.session.expired",
+        "coupon.updated",
+        "promotion_code.updated",
+    }
+)
+
+
+def _task_failed(result) -> bool:
+    """
+    Check whether a task already ran and failed.
+
+    ImmediateBackend runs the task inside enqueue() and records any exception
+    on the result instead of raising it. Worker backends return READY here.
+
+    Args:
+        result: TaskResult returned by enqueue()
+
+    Returns:
+        True if the task failed
+    """
+    if result.status != TaskResultStatus.FAILED:
+        return False
+    for error in result.errors:
+        logger.error(f"Task {result.task.name} failed: {error.traceback}")
+    return True
+
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -32,11 +68,15 @@ def stripe_webhook(request):
     Path: POST /api/webhooks/stripe/
 
     Verifies signature and routes to appropriate handler based on event type.
+    Completed and expired checkouts are processed by background tasks.
+    Redelivered events are acknowledged without being processed again; the
+    event is recorded in the same transaction as its work, so a failed
+    attempt is processed again when Stripe retries.
 
     Returns:
         - 200: Event processed successfully (or unsupported event)
         - 400: Invalid signature or request format
-        - 500: Webhook not configured
+        - 500: Webhook not configured or processing failed (Stripe retries)
     """
     payload = request.body
     sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
@@ -45,30 +85,46 @@ def stripe_webhook(request):
         logger.error("Stripe webhook received without signature")
         return JsonResponse({"error": "No signature"}, status=400)
 
-    webhook_secret = getattr(settings, "STRIPE_WEBHOOK_SECRET", None)
-
-    if not webhook_secret:
+    if not WEBHOOK_SECRET:
         logger.error("STRIPE_WEBHOOK_SECRET not configured")
         return JsonResponse({"error": "Webhook not configured"}, status=500)
 
     try:
         # Verify signature and construct event
-        event = stripe.Webhook.construct_event(payload, sig_header, webhook_secret)
+        event = stripe.Webhook.construct_event(payload, sig_header, WEBHOOK_SECRET)
 
         logger.info(f"Received Stripe webhook: {event.type}")
 
+        if (
+            event.type in HANDLED_EVENT_TYPES
+            and ProcessedStripeEvent.objects.filter(event_id=event.id).exists()
+        ):
+            logger.info(f"Stripe event {event.id} already processed, skipping")
+            return JsonResponse({"status": "duplicate"}, status=200)
+
         # Route to appropriate handler
         if event.type == "checkout.session.completed":
-            handle_checkout_completed(event.data.object)
+            # Task arguments must be JSON-serializable, so pass the raw session
+            session = json.loads(payload)["data"]["object"]
+            result = process_checkout_completed.enqueue(event.id, session)
+            if _task_failed(result):
+                # Let Stripe's retry process the event again
+                return JsonResponse({"error": "Processing failed"}, status=500)
 
         elif event.type == "checkout.session.expired":
-            handle_checkout_expired(event.data.object.id)
+            result = process_checkout_expired.enqueue(event.id, event.data.object.id)
+            if _task_failed(result):
+                return JsonResponse({"error": "Processing failed"}, status=500)
 
         elif event.type == "coupon.updated":
-            handle_coupon_updated(event.data.object)
+            with transaction.atomic():
+                if ProcessedStripeEvent.claim(event.id, event.type):
+                    handle_coupon_updated(event.data.object)
 
         elif event.type == "promotion_code.updated":
-            handle_promotion_code_updated(event.data.object)
+            with transaction.atomic():
+                if ProcessedStripeEvent.claim(event.id, event.type):
+                    handle_promotion_code_updated(event.data.object)
 
         else:
             # Log unsupported event types but return 200
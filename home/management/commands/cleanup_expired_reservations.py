@@ -6,11 +6,17 @@ or a background process to release products from reservations that have
 expired but haven't been cancelled by Stripe webhooks.
 
 Run: python manage.py cleanup_expired_reservations
+     python manage.py cleanup_expired_reservations --interval 60  (keep running)
 """
 
+import time
+
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from home.models import Reservation
+from django.db import close_old_connections
+from django.db.models.functions import Now
+from django.tasks import TaskResultStatus
+from home.models import Reservation, ReservationStatus
+from home.services import ReservationService
 
 
 class Command(BaseCommand):
@@ -22,53 +28,75 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be cancelled without actually cancelling',
         )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running and enqueue the cleanup every N seconds (0 = run once)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options.get('dry_run', False)
-        now = timezone.now()
 
-        # Find pending/active reservations that have expired
-        expired_reservations = Reservation.objects.filter(
-            status__in=['pending', 'active'],
-            expires_at__lt=now
-        )
+        if dry_run:
+            # Stream pending reservations that have expired, so a large
+            # backlog is never loaded into memory at once
+            expired_reservations = Reservation.objects.filter(
+                status=ReservationStatus.PENDING,
+                expires_at__lt=Now()
+            ).only('id', 'stripe_session_id', 'expires_at').order_by('expires_at')
+
+            count = 0
+            for reservation in expired_reservations.iterator(chunk_size=500):
+                if count == 0:
+                    self.stdout.write('Dry run: expired reservations that would be cancelled:')
+                self.stdout.write(f'  - Session {reservation.stripe_session_id} expired at {reservation.expires_at}')
+                count += 1
 
-        count = expired_reservations.count()
+            if count == 0:
+                self.stdout.write(self.style.SUCCESS('No expired reservations found'))
+                return
 
-        if count == 0:
-            self.stdout.write(self.style.SUCCESS('No expired reservations found'))
+            self.stdout.write(f'Dry run: would cancel {count} expired reservation(s)')
             return
 
-        if dry_run:
-            self.stdout.write(f'Dry run: would cancel {count} expired reservation(s):')
-            for reservation in expired_reservations:
-                self.stdout.write(f'  - Session {reservation.stripe_session_id} expired at {reservation.expires_at}')
+        interval = options.get('interval', 0)
+        if interval > 0:
+            # Imported here: home.tasks loads the Stripe SDK through the webhook
+            # handlers, which the one-off cron run doesn't need
+            from home.tasks import expire_stale_reservations
+
+            self.stdout.write(f'Cleaning up expired reservations every {interval}s')
+            try:
+                while True:
+                    # Outside the request cycle nothing replaces a connection
+                    # dropped by a database restart - do it before each run
+                    close_old_connections()
+                    task_result = expire_stale_reservations.enqueue()
+                    if task_result.status == TaskResultStatus.SUCCESSFUL:
+                        self._report(task_result.return_value)
+                    elif task_result.status == TaskResultStatus.FAILED:
+                        for error in task_result.errors:
+                            self.stdout.write(self.style.ERROR(f'Cleanup task failed: {error.traceback}'))
+                    time.sleep(interval)
+            except KeyboardInterrupt:
+                return
+
+        self._report(ReservationService.cancel_expired_reservations())
+
+    def _report(self, result):
+        """Write the outcome of a cancel_expired_reservations run."""
+        if not result['success']:
+            self.stdout.write(self.style.ERROR(f'Cleanup failed: {result.get("error")}'))
             return
 
-        # Cancel each expired reservation using the service
-        cancelled = 0
-        for reservation in expired_reservations:
-            from home.services import ReservationService
-            result = ReservationService.cancel_reservation(reservation.stripe_session_id)
-            if result['success']:
-                cancelled += 1
-                product_ids = result.get('product_ids', [])
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Cancelled reservation {reservation.stripe_session_id}, '
-                        f'released products: {product_ids}'
-                    )
-                )
-            else:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f'Failed to cancel reservation {reservation.stripe_session_id}: '
-                        f'{result.get("error")}'
-                    )
-                )
+        if result['cancelled'] == 0:
+            self.stdout.write(self.style.SUCCESS('No expired reservations found'))
+            return
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'Cleanup complete: cancelled {cancelled}/{count} expired reservation(s)'
+                f'Cleanup complete: cancelled {result["cancelled"]} expired reservation(s), '
+                f'released {result["released_products"]} product(s)'
             )
         )
@@ -0,0 +1,29 @@
+"""
+Django management command to delete old processed Stripe event records.
+
+Records only need to outlive Stripe's redelivery window (3 days), so this
+can run daily or alongside cleanup_expired_reservations.
+
+Run: python manage.py prune_stripe_events
+     python manage.py prune_stripe_events --days 60
+"""
+
+from django.core.management.base import BaseCommand
+from home.models import ProcessedStripeEvent
+from home.models.stripe_event import RETENTION_DAYS
+
+
+class Command(BaseCommand):
+    help = 'Delete processed Stripe webhook event records older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=RETENTION_DAYS,
+            help=f'Keep records from the last N days (default: {RETENTION_DAYS})',
+        )
+
+    def handle(self, *args, **options):
+        deleted = ProcessedStripeEvent.prune(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} processed Stripe event record(s)'))
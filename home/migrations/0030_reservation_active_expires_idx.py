@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-14 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0029_add_newsletter_list_id"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["status", "expires_at"],
+                name="resv_active_expires_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 6.0 on 2026-10-14 09:05
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+MULTISELECT_FIELDS = [
+    ("dla_kogo", "Dla kogo"),
+    ("kolor_pior", "Kolor piór w przewadze"),
+    ("gatunek_ptakow", "Pióra zgubiły (gatunek)"),
+    ("rodzaj_zapiecia", "Rodzaj zapięcia"),
+]
+
+
+def convert_field(name, verbose_name):
+    """
+    Replace a jsonb list column with a varchar[] column, keeping its data.
+
+    Postgres doesn't allow the subquery needed to unpack jsonb in
+    ALTER COLUMN ... USING, so the data is copied through a temporary column.
+    """
+    tmp_name = f"{name}_array"
+    return [
+        migrations.AddField(
+            model_name="product",
+            name=tmp_name,
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=30),
+                blank=True,
+                default=list,
+                size=None,
+            ),
+        ),
+        migrations.RunSQL(
+            sql=f"""
+                UPDATE home_product SET {tmp_name} = CASE
+                    WHEN jsonb_typeof({name}) = 'array'
+                    THEN ARRAY(SELECT jsonb_array_elements_text({name}))
+                    ELSE '{{}}'
+                END
+            """,
+            reverse_sql=f"UPDATE home_product SET {name} = to_jsonb({tmp_name})",
+        ),
+        migrations.RemoveField(
+            model_name="product",
+            name=name,
+        ),
+        migrations.RenameField(
+            model_name="product",
+            old_name=tmp_name,
+            new_name=name,
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name=name,
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=30),
+                blank=True,
+                default=list,
+                size=None,
+                verbose_name=verbose_name,
+            ),
+        ),
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0030_reservation_active_expires_idx"),
+    ]
+
+    operations = [
+        *[
+            operation
+            for name, verbose_name in MULTISELECT_FIELDS
+            for operation in convert_field(name, verbose_name)
+        ],
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["kolor_pior"], name="product_kolor_pior_gin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["gatunek_ptakow"], name="product_gatunek_ptakow_gin"
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-14 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0031_product_multiselect_arrayfield"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="reservation",
+            name="home_reserv_expires_c5d8e8_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="reservation",
+            name="home_reserv_reserve_3d6007_idx",
+        ),
+        migrations.AlterField(
+            model_name="reservation",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("completed", "Completed"),
+                    ("expired", "Expired"),
+                    ("cancelled", "Cancelled"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+    ]
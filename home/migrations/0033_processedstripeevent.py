@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-14 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0032_reservation_drop_duplicate_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProcessedStripeEvent",
+            fields=[
+                (
+                    "event_id",
+                    models.CharField(
+                        max_length=255,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Stripe Event ID",
+                    ),
+                ),
+                (
+                    "event_type",
+                    models.CharField(max_length=100, verbose_name="Typ zdarzenia"),
+                ),
+                (
+                    "processed_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Przetworzono"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Zdarzenie Stripe",
+                "verbose_name_plural": "Zdarzenia Stripe",
+            },
+        ),
+    ]
@@ -11,6 +11,7 @@ Organized into separate modules for better maintainability:
 - furgonetka.py: FurgonetkaConfig, FurgonetkaService
 - brevo.py: BrevoConfig
 - transaction.py: Transaction, TransactionStatus
+- stripe_event.py: ProcessedStripeEvent
 """
 
 from .product import Product, ProductImage, ProductStatus, ProductAdminForm
@@ -22,6 +23,7 @@ from .shipping import PickupPoint, InPostPoint
 from .furgonetka import FurgonetkaConfig, FurgonetkaService
 from .brevo import BrevoConfig
 from .transaction import Transaction, TransactionStatus
+from .stripe_event import ProcessedStripeEvent
 
 __all__ = [
     'Product',
@@ -43,4 +45,5 @@ __all__ = [
     'BrevoConfig',
     'Transaction',
     'TransactionStatus',
+    'ProcessedStripeEvent',
 ]
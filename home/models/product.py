@@ -2,6 +2,8 @@
 
 import logging
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.core.cache import cache
 from django import forms
@@ -76,19 +78,16 @@ class ProductAdminForm(ClusterForm):
                 self.fields['rodzaj_zapiecia'].initial = self.instance.rodzaj_zapiecia
 
     def save(self, commit=True):
+        # Set multi-select values before the save, so the row is written once
+        self.instance.dla_kogo = self.cleaned_data.get('dla_kogo', [])
+        self.instance.kolor_pior = self.cleaned_data.get('kolor_pior', [])
+        self.instance.gatunek_ptakow = self.cleaned_data.get('gatunek_ptakow', [])
+        self.instance.rodzaj_zapiecia = self.cleaned_data.get('rodzaj_zapiecia', [])
+
         # Let parent ClusterForm handle the save
         instance = super().save(commit=commit)
 
-        # Update JSONField values after save
-        instance.dla_kogo = self.cleaned_data.get('dla_kogo', [])
-        instance.kolor_pior = self.cleaned_data.get('kolor_pior', [])
-        instance.gatunek_ptakow = self.cleaned_data.get('gatunek_ptakow', [])
-        instance.rodzaj_zapiecia = self.cleaned_data.get('rodzaj_zapiecia', [])
-
-        # Save again to update the JSON fields
         if commit:
-            instance.save(update_fields=['dla_kogo', 'kolor_pior', 'gatunek_ptakow', 'rodzaj_zapiecia'])
-
             # Clean up any empty images after save
             instance.images.filter(image__isnull=True).delete()
 
@@ -223,13 +222,13 @@ class Product(ClusterableModel):
     # New fields
     nr_w_katalogu_zdjec = models.CharField(max_length=255, blank=True, default='', verbose_name="Nr w katalogu zdjęć")
     przeznaczenie_ogolne = models.CharField(max_length=255, choices=PRZEZNACZENIE_CHOICES, blank=True, default='', verbose_name="Przeznaczenie ogólne")
-    dla_kogo = models.JSONField(default=list, blank=True, null=False, verbose_name="Dla kogo")
+    dla_kogo = ArrayField(models.CharField(max_length=30), default=list, blank=True, verbose_name="Dla kogo")
     dlugosc_kategoria = models.CharField(max_length=255, choices=DLUGOSC_KATEGORIA_CHOICES, blank=True, default='', verbose_name="Długość kategoria")
     dlugosc_w_cm = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, verbose_name="Długość w cm")
-    kolor_pior = models.JSONField(default=list, blank=True, null=False, verbose_name="Kolor piór w przewadze")
-    gatunek_ptakow = models.JSONField(default=list, blank=True, null=False, verbose_name="Pióra zgubiły (gatunek)")
+    kolor_pior = ArrayField(models.CharField(max_length=30), default=list, blank=True, verbose_name="Kolor piór w przewadze")
+    gatunek_ptakow = ArrayField(models.CharField(max_length=30), default=list, blank=True, verbose_name="Pióra zgubiły (gatunek)")
     kolor_elementow_metalowych = models.CharField(max_length=255, choices=KOLOR_METALOWYCH_CHOICES, blank=True, default='', verbose_name="Kolor elementów metalowych")
-    rodzaj_zapiecia = models.JSONField(default=list, blank=True, null=False, verbose_name="Rodzaj zapięcia")
+    rodzaj_zapiecia = ArrayField(models.CharField(max_length=30), default=list, blank=True, verbose_name="Rodzaj zapięcia")
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -297,7 +296,7 @@ class Product(ClusterableModel):
         if not self.price or self.price <= 0:
             errors['price'] = 'Cena podstawowa musi być większa niż 0'
 
-        # Validate JSONField fields are lists
+        # Validate multi-select fields are lists
         if self.dla_kogo is not None and not isinstance(self.dla_kogo, list):
             errors['dla_kogo'] = 'Nieprawidłowy format danych'
 
@@ -348,22 +347,20 @@ class Product(ClusterableModel):
         # Auto-generate slug from name
         if not self.slug:
             base_slug = slugify(self.name)
-            slug = base_slug
-            counter = 1
-            # Exclude current instance if updating
-            queryset = Product.objects.filter(slug=slug)
+            # Fetch all taken candidates in one query, excluding current instance if updating
+            queryset = Product.objects.filter(slug__startswith=base_slug)
             if self.pk:
                 queryset = queryset.exclude(pk=self.pk)
+            taken_slugs = set(queryset.values_list('slug', flat=True))
 
-            while queryset.exists():
+            slug = base_slug
+            counter = 1
+            while slug in taken_slugs:
                 slug = f"{base_slug}-{counter}"
-                queryset = Product.objects.filter(slug=slug)
-                if self.pk:
-                    queryset = queryset.exclude(pk=self.pk)
                 counter += 1
             self.slug = slug
 
-        # Ensure JSONField fields are never NULL, always use empty list
+        # Ensure multi-select fields are never NULL, always use empty list
         if self.dla_kogo is None:
             self.dla_kogo = []
         if self.kolor_pior is None:
@@ -409,4 +406,7 @@ class Product(ClusterableModel):
             models.Index(fields=['active', '-created_at']),
             models.Index(fields=['featured', '-created_at']),
             models.Index(fields=['status', '-created_at']),
+            # Multi-select filters, e.g. kolor_pior__contains=['czarny']
+            GinIndex(fields=['kolor_pior'], name='product_kolor_pior_gin'),
+            GinIndex(fields=['gatunek_ptakow'], name='product_gatunek_ptakow_gin'),
         ]
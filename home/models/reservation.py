@@ -30,8 +30,7 @@ class Reservation(models.Model):
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
-        default=ReservationStatus.PENDING,
-        db_index=True
+        default=ReservationStatus.PENDING
     )
     reserved_at = models.DateTimeField(auto_now_add=True, db_index=True)
     expires_at = models.DateTimeField(db_index=True)
@@ -43,10 +42,16 @@ class Reservation(models.Model):
         verbose_name = "Rezerwacja"
         verbose_name_plural = "Rezerwacje"
         ordering = ['-reserved_at']
+        # expires_at and reserved_at are indexed via db_index; stripe_session_id
+        # via its unique constraint
         indexes = [
-            models.Index(fields=['expires_at']),
             models.Index(fields=['status']),
-            models.Index(fields=['-reserved_at']),
+            # Partial index for the expired-reservation cleanup scan
+            models.Index(
+                fields=['status', 'expires_at'],
+                name='resv_active_expires_idx',
+                condition=models.Q(status=ReservationStatus.PENDING),
+            ),
         ]
 
     def __str__(self):
@@ -0,0 +1,72 @@
+"""Processed Stripe webhook events, used to ignore redeliveries."""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+# Stripe retries a webhook for up to 3 days; keep records well past that
+RETENTION_DAYS = 30
+
+
+class ProcessedStripeEvent(models.Model):
+    """
+    Stripe webhook event that has already been handled.
+
+    Stripe may deliver the same event more than once. The event ID is
+    inserted in the same transaction as the work it triggers, so a failed
+    attempt leaves no record and the redelivery is processed again, while a
+    duplicate insert means the event was already handled.
+    """
+    event_id = models.CharField(
+        max_length=255,
+        primary_key=True,
+        verbose_name="Stripe Event ID"
+    )
+    event_type = models.CharField(
+        max_length=100,
+        verbose_name="Typ zdarzenia"
+    )
+    processed_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name="Przetworzono"
+    )
+
+    class Meta:
+        verbose_name = "Zdarzenie Stripe"
+        verbose_name_plural = "Zdarzenia Stripe"
+
+    def __str__(self):
+        return f"{self.event_id} - {self.event_type}"
+
+    @classmethod
+    def claim(cls, event_id: str, event_type: str) -> bool:
+        """
+        Record an event as processed.
+
+        Call inside the transaction that does the event's work. A concurrent
+        delivery of the same event waits on the insert until that transaction
+        finishes.
+
+        Returns:
+            True if the event is new, False if it was already processed
+        """
+        try:
+            with transaction.atomic():
+                cls.objects.create(event_id=event_id, event_type=event_type)
+            return True
+        except IntegrityError:
+            return False
+
+    @classmethod
+    def prune(cls, days: int = RETENTION_DAYS) -> int:
+        """
+        Delete records older than Stripe's redelivery window.
+
+        Returns:
+            Number of deleted records
+        """
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = cls.objects.filter(processed_at__lt=cutoff).delete()
+        return deleted
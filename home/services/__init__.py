@@ -9,7 +9,6 @@ Contains service classes for:
 """
 
 from .brevo import BrevoService
-from .stripe import StripeSync
 from .furgonetka import FurgonetkaService
 from .reservation import ReservationService
 
@@ -19,3 +18,12 @@ __all__ = [
     'FurgonetkaService',
     'ReservationService',
 ]
+
+
+def __getattr__(name):
+    # The Stripe SDK takes most of a second to import, so StripeSync is only
+    # loaded on first use instead of on every django.setup()
+    if name == 'StripeSync':
+        from .stripe import StripeSync
+        return StripeSync
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
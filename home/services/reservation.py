@@ -9,7 +9,8 @@ import logging
 from typing import List, Optional, Dict
 from datetime import timedelta
 from django.utils import timezone
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
+from django.db.models.functions import Now
 
 from home.models import Product, ProductStatus, Reservation, ReservationStatus, ReservedProduct
 
@@ -18,6 +19,42 @@ logger = logging.getLogger(__name__)
 # Default reservation timeout in minutes (should match Stripe checkout expiration)
 DEFAULT_RESERVATION_MINUTES = 30  # Stripe default is 30 minutes for checkout sessions
 
+# Reservation failures: product status -> message shown to the customer
+_STATUS_MESSAGES_PL = {
+    ProductStatus.RESERVED: 'Produkt jest zarezerwowany przez innego klienta',
+    ProductStatus.SOLD: 'Produkt został już sprzedany',
+    ProductStatus.INACTIVE: 'Produkt jest nieaktywny',
+}
+_DEFAULT_MESSAGE_PL = 'Produkt jest niedostępny'
+NOT_FOUND_MESSAGE_PL = 'Produkt nie został znaleziony'
+
+# Availability check: product status -> (reason, message)
+_AVAILABILITY_REASONS = {
+    ProductStatus.RESERVED: ('reserved', 'Produkt jest zarezerwowany przez innego klienta'),
+    ProductStatus.SOLD: ('sold', 'Produkt został już sprzedany'),
+    ProductStatus.INACTIVE: ('inactive', 'Produkt jest niedostępny'),
+}
+_UNAVAILABLE_REASON = ('unavailable', _DEFAULT_MESSAGE_PL)
+
+
+def _unavailable_reason(status: Optional[str]) -> Dict:
+    """
+    Explain why a product could not be claimed for a reservation.
+
+    Args:
+        status: Current product status, or None if the product doesn't exist
+
+    Returns:
+        Dict with 'reason' and 'message' keys
+    """
+    if status is None:
+        return {'reason': 'not_found', 'message': NOT_FOUND_MESSAGE_PL}
+    if status == ProductStatus.ACTIVE:
+        # Still ACTIVE but skipped by SKIP LOCKED: a concurrent checkout is
+        # reserving it, which clients see the same as an existing reservation
+        return {'reason': ProductStatus.RESERVED.value, 'message': _STATUS_MESSAGES_PL[ProductStatus.RESERVED]}
+    return {'reason': status, 'message': _STATUS_MESSAGES_PL.get(status, _DEFAULT_MESSAGE_PL)}
+
 
 class ReservationService:
     """
@@ -42,8 +79,12 @@ class ReservationService:
         """
         Reserve products when checkout session is created.
 
-        Uses select_for_update() to prevent race conditions when multiple
-        users try to buy the same product simultaneously.
+        Claims the products with a single conditional
+        UPDATE ... RETURNING that only flips ACTIVE rows to RESERVED, so the
+        availability check and the status change happen in one round-trip.
+        Rows locked by a concurrent checkout are skipped (SKIP LOCKED) and
+        reported as 'reserved' straight away instead of waiting for that
+        checkout to commit. Requires PostgreSQL.
 
         Args:
             products: List of Product instances to reserve
@@ -58,86 +99,83 @@ class ReservationService:
                 - unavailable_products (list): Products that couldn't be reserved
                 - error (str): Error message if failed
         """
+        if not products:
+            # Nothing to lock - don't open a transaction just to find out
+            return {
+                'success': False,
+                'unavailable_products': [],
+                'error': 'No products to reserve'
+            }
+
         unavailable_products = []
 
         try:
             with transaction.atomic():
-                # Lock products for update to prevent race conditions
                 product_ids = [p.pk for p in products]
-                locked_products = list(
-                    Product.objects
-                    .select_for_update()
-                    .filter(pk__in=product_ids)
-                )
-
-                # Create a dict for easy lookup
-                product_map = {p.pk: p for p in locked_products}
-
-                # Check all products are still buyable
-                for product in products:
-                    locked_product = product_map.get(product.pk)
-                    if not locked_product:
-                        unavailable_products.append({
+                claimed_ids = ReservationService._claim_active_products(product_ids)
+
+                # Products that didn't come back from the UPDATE are unavailable.
+                # Our own claims can't affect them, so their current status
+                # tells us why. Nothing to classify when every product was claimed
+                missing_ids = set(product_ids) - claimed_ids
+                if missing_ids:
+                    missing_statuses = dict(
+                        Product.objects
+                        .filter(pk__in=missing_ids)
+                        .values_list('pk', 'status')
+                    )
+                    unavailable_products = [
+                        {
                             'id': product.pk,
                             'name': product.name,
-                            'reason': 'not_found',
-                            'message': 'Produkt nie został znaleziony'
-                        })
-                        continue
-
-                    if locked_product.status != ProductStatus.ACTIVE:
-                        status_reasons = {
-                            ProductStatus.RESERVED: 'Produkt jest zarezerwowany przez innego klienta',
-                            ProductStatus.SOLD: 'Produkt został już sprzedany',
-                            ProductStatus.INACTIVE: 'Produkt jest nieaktywny',
+                            **_unavailable_reason(missing_statuses.get(product.pk)),
                         }
-                        unavailable_products.append({
-                            'id': product.pk,
-                            'name': product.name,
-                            'reason': locked_product.status,
-                            'message': status_reasons.get(
-                                locked_product.status,
-                                'Produkt jest niedostępny'
-                            )
-                        })
+                        for product in products
+                        if product.pk in missing_ids
+                    ]
 
                 if unavailable_products:
-                    # Rollback transaction - no reservation created
+                    # A retry for a session we already reserved finds its
+                    # own products RESERVED - hand back the existing reservation
+                    existing = ReservationService._pending_reservation_result(stripe_session_id, product_ids)
+
+                    # Undo the claimed products - no reservation created
+                    transaction.set_rollback(True)
+                    if existing:
+                        return existing
+
                     return {
                         'success': False,
                         'unavailable_products': unavailable_products,
                         'error': 'Some products are not available'
                     }
 
-                # All products available - create reservation
-                expires_at = timezone.now() + timedelta(minutes=timeout_minutes)
-
+                # All products available - create reservation. Expiry is computed
+                # by the database clock, the same one the cleanup compares against.
+                # A duplicate session ID fails the insert and rolls back the claim
+                # with it - handled below
                 reservation = Reservation.objects.create(
                     stripe_session_id=stripe_session_id,
                     status=ReservationStatus.PENDING,
-                    expires_at=expires_at,
+                    expires_at=Now() + timedelta(minutes=timeout_minutes),
                     customer_email=customer_email
                 )
 
-                # Create ReservedProduct relations and update product status
-                reserved_products = []
-                for product in locked_products:
-                    ReservedProduct.objects.create(
-                        reservation=reservation,
-                        product=product
-                    )
-                    reserved_products.append(product)
-
-                # Update product status to RESERVED
-                Product.objects.filter(pk__in=product_ids).update(
-                    status=ProductStatus.RESERVED
+                # Create ReservedProduct relations in one INSERT
+                ReservedProduct.objects.bulk_create(
+                    [
+                        ReservedProduct(reservation=reservation, product_id=product_id)
+                        for product_id in claimed_ids
+                    ],
+                    batch_size=500
                 )
 
-                product_ids_str = ','.join(str(p.pk) for p in reserved_products)
+                # Filled in from INSERT ... RETURNING, no extra query
+                expires_at = reservation.expires_at
+
                 logger.info(
-                    f"Created reservation {reservation.id} for session "
-                    f"{stripe_session_id}, products [{product_ids_str}], "
-                    f"expires at {expires_at}"
+                    "Created reservation %s for session %s, products %s, expires at %s",
+                    reservation.id, stripe_session_id, product_ids, expires_at
                 )
 
                 return {
@@ -146,6 +184,16 @@ class ReservationService:
                     'expires_at': expires_at
                 }
 
+        except IntegrityError:
+            # Session already has a reservation - don't attach more products
+            existing = ReservationService._pending_reservation_result(stripe_session_id, product_ids)
+            if existing:
+                return existing
+            return {
+                'success': False,
+                'error': f'Reservation for session {stripe_session_id} already exists'
+            }
+
         except Exception as e:
             error_msg = f"Error creating reservation: {str(e)}"
             logger.exception(error_msg)
@@ -154,6 +202,70 @@ class ReservationService:
                 'error': error_msg
             }
 
+    @staticmethod
+    def _pending_reservation_result(stripe_session_id: str, product_ids: List[int]) -> Optional[Dict]:
+        """
+        Build a reserve_products result for an existing pending reservation.
+
+        The reservation is only reused when it holds exactly the requested
+        products - a different basket must not be reported as reserved.
+
+        Args:
+            stripe_session_id: Stripe checkout session ID
+            product_ids: IDs of the products the caller wants reserved
+
+        Returns:
+            Success dict like reserve_products returns, or None if the session
+            has no pending reservation for these products
+        """
+        reservation = Reservation.objects.filter(
+            stripe_session_id=stripe_session_id,
+            status=ReservationStatus.PENDING
+        ).first()
+        if reservation is None:
+            return None
+
+        reserved_ids = set(reservation.reserved_products.values_list('product_id', flat=True))
+        if reserved_ids != set(product_ids):
+            return None
+
+        logger.info(
+            "Reservation %s for session %s already exists, reusing it",
+            reservation.id, stripe_session_id
+        )
+        return {
+            'success': True,
+            'reservation': reservation,
+            'expires_at': reservation.expires_at
+        }
+
+    @staticmethod
+    def _claim_active_products(product_ids: List[int]) -> set:
+        """
+        Atomically switch ACTIVE products to RESERVED.
+
+        Runs a single UPDATE ... RETURNING, so the rows are locked and updated
+        in the same statement. Rows already locked by another transaction are
+        skipped rather than waited on.
+
+        Args:
+            product_ids: IDs of the products to claim
+
+        Returns:
+            Set of IDs that were switched to RESERVED
+        """
+        table = connection.ops.quote_name(Product._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET status = %s, updated_at = %s "
+                f"WHERE id IN ("
+                f"SELECT id FROM {table} WHERE id = ANY(%s) AND status = %s "
+                f"FOR UPDATE SKIP LOCKED"
+                f") RETURNING id",
+                [ProductStatus.RESERVED, timezone.now(), list(product_ids), ProductStatus.ACTIVE]
+            )
+            return {row[0] for row in cursor.fetchall()}
+
     @staticmethod
     def complete_reservation(stripe_session_id: str) -> Dict:
         """
@@ -166,7 +278,9 @@ class ReservationService:
             stripe_session_id: Stripe checkout session ID
 
         Returns:
-            Dict with 'success' (bool), 'reservation', and 'product_ids'
+            Dict with 'success' (bool), 'reservation', and 'product_ids'.
+            'product_ids' is also returned when the reservation exists but
+            is no longer pending (e.g. paid after it expired).
         """
         try:
             with transaction.atomic():
@@ -174,13 +288,19 @@ class ReservationService:
                     stripe_session_id=stripe_session_id
                 )
 
+                # Reserved products are the canonical product list for the session
+                product_ids = list(
+                    reservation.reserved_products.values_list('product_id', flat=True)
+                )
+
                 if reservation.status != ReservationStatus.PENDING:
                     logger.warning(
-                        f"Reservation {reservation.id} is not pending "
-                        f"(status: {reservation.status}), cannot complete"
+                        "Reservation %s is not pending (status: %s), cannot complete",
+                        reservation.id, reservation.status
                     )
                     return {
                         'success': False,
+                        'product_ids': product_ids,
                         'error': f'Reservation is not pending (status: {reservation.status})'
                     }
 
@@ -189,15 +309,9 @@ class ReservationService:
                 reservation.save(update_fields=['status', 'completed_at'])
 
                 logger.info(
-                    f"Completed reservation {reservation.id} "
-                    f"for session {stripe_session_id}"
-                )
-
-                # Get reserved products for marking as sold
-                reserved_products = list(
-                    reservation.reserved_products.select_related('product').all()
+                    "Completed reservation %s for session %s",
+                    reservation.id, stripe_session_id
                 )
-                product_ids = [rp.product.pk for rp in reserved_products]
 
                 return {
                     'success': True,
@@ -206,7 +320,7 @@ class ReservationService:
                 }
 
         except Reservation.DoesNotExist:
-            logger.error(f"Reservation for session {stripe_session_id} not found")
+            logger.error("Reservation for session %s not found", stripe_session_id)
             return {
                 'success': False,
                 'error': 'Reservation not found'
@@ -231,7 +345,8 @@ class ReservationService:
             stripe_session_id: Stripe checkout session ID
 
         Returns:
-            Dict with 'success' (bool) and optional 'error' message
+            Dict with 'success' (bool), 'reservation' and 'released_products'
+            (int), or 'error' message
         """
         try:
             with transaction.atomic():
@@ -241,42 +356,41 @@ class ReservationService:
 
                 if reservation.status != ReservationStatus.PENDING:
                     logger.warning(
-                        f"Reservation {reservation.id} is not pending "
-                        f"(status: {reservation.status}), cannot cancel"
+                        "Reservation %s is not pending (status: %s), cannot cancel",
+                        reservation.id, reservation.status
                     )
                     return {
                         'success': False,
                         'error': f'Reservation is not pending (status: {reservation.status})'
                     }
 
-                # Get product IDs before deleting reservation
-                product_ids = list(
-                    reservation.reserved_products.values_list('product_id', flat=True)
-                )
-
                 # Update reservation status to EXPIRED (for expired checkouts)
                 reservation.status = ReservationStatus.EXPIRED
                 reservation.save(update_fields=['status'])
 
-                # Release products back to ACTIVE
-                Product.objects.filter(pk__in=product_ids).update(
-                    status=ProductStatus.ACTIVE
+                # Release products back to ACTIVE in one UPDATE driven by a
+                # subquery over ReservedProduct
+                released = Product.objects.filter(
+                    reservations__reservation=reservation,
+                    status=ProductStatus.RESERVED
+                ).update(
+                    status=ProductStatus.ACTIVE,
+                    updated_at=timezone.now()
                 )
 
-                product_ids_str = ','.join(str(pid) for pid in product_ids)
                 logger.info(
-                    f"Cancelled reservation {reservation.id} for session "
-                    f"{stripe_session_id}, released products [{product_ids_str}]"
+                    "Cancelled reservation %s for session %s, released %s product(s)",
+                    reservation.id, stripe_session_id, released
                 )
 
                 return {
                     'success': True,
                     'reservation': reservation,
-                    'released_product_ids': product_ids
+                    'released_products': released
                 }
 
         except Reservation.DoesNotExist:
-            logger.error(f"Reservation for session {stripe_session_id} not found")
+            logger.error("Reservation for session %s not found", stripe_session_id)
             return {
                 'success': False,
                 'error': 'Reservation not found'
@@ -289,6 +403,67 @@ class ReservationService:
                 'error': error_msg
             }
 
+    @staticmethod
+    def cancel_expired_reservations() -> Dict:
+        """
+        Expire all pending reservations past their expires_at in one batch.
+
+        Used by the periodic cleanup (API endpoint and management command)
+        for reservations whose checkout.session.expired webhook never arrived.
+        Rows locked by a concurrent webhook are skipped and picked up by the
+        next run.
+
+        Returns:
+            Dict with 'success' (bool), 'cancelled' (int) and
+            'released_products' (int), or 'error' message
+        """
+        now = timezone.now()
+
+        try:
+            with transaction.atomic():
+                reservation_ids = list(
+                    Reservation.objects
+                    .select_for_update(skip_locked=True)
+                    .filter(status=ReservationStatus.PENDING, expires_at__lt=Now())
+                    .values_list('id', flat=True)
+                )
+
+                if not reservation_ids:
+                    return {
+                        'success': True,
+                        'cancelled': 0,
+                        'released_products': 0
+                    }
+
+                # Release products back to ACTIVE
+                released = Product.objects.filter(
+                    reservations__reservation_id__in=reservation_ids,
+                    status=ProductStatus.RESERVED
+                ).update(status=ProductStatus.ACTIVE, updated_at=now)
+
+                cancelled = Reservation.objects.filter(
+                    pk__in=reservation_ids
+                ).update(status=ReservationStatus.EXPIRED)
+
+                logger.info(
+                    "Expired %s reservation(s), released %s product(s)",
+                    cancelled, released
+                )
+
+                return {
+                    'success': True,
+                    'cancelled': cancelled,
+                    'released_products': released
+                }
+
+        except Exception as e:
+            error_msg = f"Error cancelling expired reservations: {str(e)}"
+            logger.exception(error_msg)
+            return {
+                'success': False,
+                'error': error_msg
+            }
+
     @staticmethod
     def check_product_availability(product_ids: List[int]) -> Dict:
         """
@@ -301,41 +476,35 @@ class ReservationService:
             Dict with 'available' (list) and 'unavailable' (list of dicts)
         """
         try:
-            products = Product.objects.filter(pk__in=product_ids)
+            # One query returning only (pk, status) pairs
+            product_statuses = dict(
+                Product.objects
+                .filter(pk__in=product_ids)
+                .values_list('pk', 'status')
+            )
 
             available = []
             unavailable = []
 
             for product_id in product_ids:
-                try:
-                    product = products.get(pk=product_id)
-
-                    if product.status == ProductStatus.ACTIVE:
-                        available.append(product_id)
-                    else:
-                        status_reasons = {
-                            ProductStatus.RESERVED: 'reserved',
-                            ProductStatus.SOLD: 'sold',
-                            ProductStatus.INACTIVE: 'inactive',
-                        }
-                        unavailable.append({
-                            'id': product_id,
-                            'reason': status_reasons.get(
-                                product.status,
-                                'unavailable'
-                            ),
-                            'message': {
-                                'reserved': 'Produkt jest zarezerwowany przez innego klienta',
-                                'sold': 'Produkt został już sprzedany',
-                                'inactive': 'Produkt jest niedostępny',
-                            }.get(status_reasons.get(product.status, 'unavailable'),
-                                  'Produkt jest niedostępny')
-                        })
-                except Product.DoesNotExist:
+                product_status = product_statuses.get(product_id)
+
+                if product_status is None:
                     unavailable.append({
                         'id': product_id,
                         'reason': 'not_found',
-                        'message': 'Produkt nie został znaleziony'
+                        'message': NOT_FOUND_MESSAGE_PL
+                    })
+                elif product_status == ProductStatus.ACTIVE:
+                    available.append(product_id)
+                else:
+                    reason, message = _AVAILABILITY_REASONS.get(
+                        product_status, _UNAVAILABLE_REASON
+                    )
+                    unavailable.append({
+                        'id': product_id,
+                        'reason': reason,
+                        'message': message
                     })
 
             return {
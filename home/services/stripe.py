@@ -9,10 +9,16 @@ import logging
 import re
 from typing import Optional, List
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
 from django.utils.html import strip_tags
 import stripe
 
+from home.models import Product, ProductStatus
+
 # Configure Stripe to use certifi's CA bundle for TLS connections
 # This fixes issues where the bundled certificate path is invalid
 try:
@@ -106,7 +112,8 @@ class StripeSync:
         Returns:
             Integer price in grosze (1 PLN = 100 grosze)
         """
-        return int(float(price_value) * 100)
+        # Stay in Decimal - float rounding turns e.g. 4.35 PLN into 434 grosze
+        return int((Decimal(str(price_value)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
 
     @staticmethod
     def _get_discount_amount(product) -> Optional[int]:
@@ -242,9 +249,11 @@ class StripeSync:
                     logger.info(f"Created replacement Stripe price {new_stripe_price.id}")
 
             # Save the updated IDs to the product
-            # Skip signal to prevent infinite loop
-            product._skip_stripe_sync = True
-            product.save(update_fields=['stripe_product_id', 'stripe_price_id'])
+            # Queryset update skips save() and its signals, preventing an infinite loop
+            Product.objects.filter(pk=product.pk).update(
+                stripe_product_id=product.stripe_product_id,
+                stripe_price_id=product.stripe_price_id,
+            )
 
             return {'success': True}
 
@@ -306,13 +315,11 @@ class StripeSync:
             Dict with 'success' (bool) and optional 'error' message
         """
         try:
-            from django.utils import timezone
-
             # Update product status and sold_at
             product.status = 'sold'
             product.sold_at = timezone.now()
             product.active = False  # Also update legacy field
-            product.save(update_fields=['status', 'sold_at', 'active'])
+            product.save(update_fields=['status', 'sold_at', 'active', 'updated_at'])
 
             # Deactivate Stripe product
             if product.stripe_product_id:
@@ -328,6 +335,68 @@ class StripeSync:
             logger.error(f"Error marking product {product.pk} as sold: {error_msg}")
             return {'success': False, 'error': error_msg}
 
+    @staticmethod
+    def mark_many_as_sold(products: List) -> dict:
+        """
+        Mark several products as sold with a single UPDATE.
+
+        Bypasses Product.save(), so no Stripe sync signals are fired. Stripe
+        Products are left active - call deactivate_products once the
+        surrounding transaction has committed.
+
+        Args:
+            products: List of Product instances
+
+        Returns:
+            Dict with 'success' (bool), 'updated' (int) and optional 'error' message
+        """
+        product_ids = [product.pk for product in products]
+
+        try:
+            sold_at = timezone.now()
+            updated = Product.objects.filter(pk__in=product_ids).update(
+                status=ProductStatus.SOLD,
+                sold_at=sold_at,
+                active=False,  # Also update legacy field
+                updated_at=sold_at,
+            )
+
+            # Sold products drop out of the filter values
+            transaction.on_commit(lambda: cache.delete('product_filters'))
+
+        except Exception as e:
+            error_msg = f"Unexpected error: {str(e)}"
+            logger.error(f"Error marking products {product_ids} as sold: {error_msg}")
+            return {'success': False, 'error': error_msg}
+
+        for product in products:
+            product.status = ProductStatus.SOLD
+            product.sold_at = sold_at
+            product.active = False
+
+        logger.info(f"Marked {updated} product(s) as sold: {product_ids}")
+        return {'success': True, 'updated': updated}
+
+    @staticmethod
+    def deactivate_products(products: List) -> None:
+        """
+        Deactivate the Stripe Products of sold products.
+
+        Failures are logged; the products stay sold locally.
+
+        Args:
+            products: List of Product instances
+        """
+        for product in products:
+            if not product.stripe_product_id:
+                continue
+            result = StripeSync.deactivate_product(product)
+            if not result['success']:
+                logger.warning(
+                    f"Product {product.pk} marked as sold but Stripe deactivation failed: "
+                    f"{result.get('error')}"
+                )
+
     @staticmethod
     def create_checkout_session(
         product,
@@ -694,7 +763,7 @@ class StripeSync:
                 coupon_params['percent_off'] = coupon.percent_off
             else:
                 # Convert PLN to grosze (multiply by 100)
-                amount_grosze = int(float(coupon.amount_off) * 100)
+                amount_grosze = StripeSync._price_to_grosze(coupon.amount_off)
                 coupon_params['amount_off'] = amount_grosze
                 coupon_params['currency'] = SHIPPING_CURRENCY
 
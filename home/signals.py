@@ -6,11 +6,11 @@ Stripe products in sync with Wagtail products.
 """
 
 import logging
+from django.conf import settings
 from django.db.models.signals import pre_save, post_save
 from django.dispatch import receiver
 
 from .models import Product, ProductStatus, Coupon, CouponStatus
-from .services import StripeSync
 
 logger = logging.getLogger(__name__)
 
@@ -22,13 +22,18 @@ def track_product_status_change(sender, instance, **kwargs):
 
     This allows us to detect status changes in post_save.
     """
+    # Old status is only needed for Stripe sync
+    if getattr(instance, '_skip_stripe_sync', False):
+        return
+
+    # Fetch just the status column, not the whole row
+    instance._old_status = None
     if instance.pk:
-        try:
-            old_instance = Product.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except Product.DoesNotExist:
-            # New product, no old status
-            instance._old_status = None
+        instance._old_status = (
+            Product.objects.filter(pk=instance.pk)
+            .values_list('status', flat=True)
+            .first()
+        )
 
 
 @receiver(post_save, sender=Product)
@@ -47,11 +52,13 @@ def sync_product_to_stripe(sender, instance, created, **kwargs):
         return
 
     # Skip if Stripe is not configured
-    from django.conf import settings
     if not hasattr(settings, 'STRIPE_SECRET_KEY') or not settings.STRIPE_SECRET_KEY:
         logger.debug("Stripe not configured, skipping sync")
         return
 
+    # Imported here so loading signals doesn't pull in the Stripe SDK
+    from .services import StripeSync
+
     try:
         current_status = instance.status
         old_status = instance._old_status
@@ -102,19 +109,18 @@ def sync_coupon_to_stripe(sender, instance, created, **kwargs):
     - If status changed to inactive: deactivate in Stripe
     - If status is active: create or update in Stripe
     """
-    from .models import Coupon, CouponStatus
-
     # Skip if explicitly requested
     if hasattr(instance, '_skip_stripe_sync') and instance._skip_stripe_sync:
         logger.debug(f"Skipping Stripe sync for coupon {instance.pk}")
         return
 
     # Skip if Stripe is not configured
-    from django.conf import settings
     if not hasattr(settings, 'STRIPE_SECRET_KEY') or not settings.STRIPE_SECRET_KEY:
         logger.debug("Stripe not configured, skipping coupon sync")
         return
 
+    from .services import StripeSync
+
     try:
         current_status = instance.status
         old_status = instance._old_status
@@ -0,0 +1,74 @@
+"""
+Background tasks for Stripe webhook processing and reservation cleanup.
+
+Webhooks enqueue the event processing (database updates, Stripe,
+Furgonetka and Brevo API calls) here. With the default ImmediateBackend
+the task runs inside the webhook request, and a failure is reported back
+to Stripe as a 500 so the event is retried.
+
+Each Stripe event is claimed in the same transaction as its work, so a
+failure rolls the claim back and the redelivered event is processed again.
+"""
+
+import logging
+
+from django.db import transaction
+from django.tasks import task
+
+from home.api.stripe_webhooks_handlers import (
+    handle_checkout_completed,
+    handle_checkout_expired,
+)
+from home.models import ProcessedStripeEvent
+from home.services import ReservationService
+
+logger = logging.getLogger(__name__)
+
+
+@task
+def process_checkout_completed(event_id: str, session: dict) -> None:
+    """
+    Process a completed checkout session.
+
+    The event claim and the order's local writes commit together; Stripe,
+    Furgonetka and Brevo calls run once that transaction has committed.
+
+    Args:
+        event_id: ID of the Stripe event that delivered the session
+        session: Stripe checkout session object as a plain dict
+    """
+    with transaction.atomic():
+        if not ProcessedStripeEvent.claim(event_id, "checkout.session.completed"):
+            logger.info(f"Stripe event {event_id} already processed, skipping")
+            return
+        handle_checkout_completed(session)
+
+
+@task
+def process_checkout_expired(event_id: str, session_id: str) -> None:
+    """
+    Cancel the reservation of an expired checkout session.
+
+    Args:
+        event_id: ID of the Stripe event that delivered the session
+        session_id: Stripe checkout session ID
+    """
+    with transaction.atomic():
+        if not ProcessedStripeEvent.claim(event_id, "checkout.session.expired"):
+            logger.info(f"Stripe event {event_id} already processed, skipping")
+            return
+        handle_checkout_expired(session_id)
+
+
+@task
+def expire_stale_reservations() -> dict:
+    """
+    Release products held by pending reservations past their expiry.
+
+    Safety net for checkout.session.expired webhooks that Stripe never
+    delivered. Enqueued by ``cleanup_expired_reservations --interval``.
+
+    Returns:
+        Result of ReservationService.cancel_expired_reservations
+    """
+    return ReservationService.cancel_expired_reservations()
@@ -1,4 +1,31 @@
-from home.models import HomePage
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.tasks import TaskResultStatus
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from home.models import (
+    HomePage,
+    ProcessedStripeEvent,
+    Product,
+    ProductStatus,
+    Reservation,
+    ReservationStatus,
+    ReservedProduct,
+)
+from home.api.serializers import MAX_PRODUCT_IDS, CheckAvailabilityRequestSerializer
+from home.services import ReservationService, StripeSync
+from home.tasks import expire_stale_reservations, process_checkout_completed
 
 from wagtail.models import Page, Site
 from wagtail.test.utils import WagtailPageTestCase
@@ -42,3 +69,512 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(self.homepage.url)
         self.assertTemplateUsed(response, "home/home_page.html")
+
+
+class ProductSlugTests(TestCase):
+    """
+    Tests for automatic product slug generation.
+    """
+
+    def test_slug_gets_first_free_suffix(self):
+        Product.objects.create(name="Kolczyki", price=Decimal("100.00"))
+        Product.objects.create(
+            name="Kolczyki", price=Decimal("100.00"), slug="kolczyki-2"
+        )
+
+        product = Product.objects.create(name="Kolczyki", price=Decimal("100.00"))
+
+        self.assertEqual(product.slug, "kolczyki-1")
+
+
+class ReservationServiceTests(TestCase):
+    """
+    Tests for the product reservation lifecycle.
+    """
+
+    def create_product(self, name, status=ProductStatus.ACTIVE):
+        return Product.objects.create(name=name, price=Decimal("100.00"), status=status)
+
+    def create_reservation(self, session_id, products, expires_in):
+        reservation = Reservation.objects.create(
+            stripe_session_id=session_id,
+            status=ReservationStatus.PENDING,
+            expires_at=timezone.now() + expires_in,
+        )
+        for product in products:
+            ReservedProduct.objects.create(reservation=reservation, product=product)
+        return reservation
+
+    def test_reserve_products(self):
+        products = [self.create_product(name) for name in ("A", "B", "C")]
+
+        result = ReservationService.reserve_products(products, "cs_reserve")
+
+        self.assertTrue(result["success"])
+        self.assertCountEqual(
+            result["reservation"].reserved_products.values_list(
+                "product_id", flat=True
+            ),
+            [p.pk for p in products],
+        )
+        self.assertFalse(
+            Product.objects.filter(pk__in=[p.pk for p in products])
+            .exclude(status=ProductStatus.RESERVED)
+            .exists()
+        )
+
+    def test_reserve_products_retry_returns_existing_reservation(self):
+        products = [self.create_product(name) for name in ("A", "B")]
+        first = ReservationService.reserve_products(products, "cs_retry")
+
+        retry = ReservationService.reserve_products(products, "cs_retry")
+
+        self.assertTrue(retry["success"])
+        self.assertEqual(retry["reservation"].pk, first["reservation"].pk)
+        self.assertEqual(
+            ReservedProduct.objects.filter(reservation=first["reservation"]).count(), 2
+        )
+
+    def test_reserve_products_does_not_extend_existing_session(self):
+        reserved = self.create_product("A")
+        other = self.create_product("B")
+        first = ReservationService.reserve_products([reserved], "cs_existing")
+
+        result = ReservationService.reserve_products([other], "cs_existing")
+
+        self.assertFalse(result["success"])
+        self.assertNotIn("reservation", result)
+        other.refresh_from_db()
+        self.assertEqual(other.status, ProductStatus.ACTIVE)
+        self.assertEqual(
+            list(
+                first["reservation"].reserved_products.values_list(
+                    "product_id", flat=True
+                )
+            ),
+            [reserved.pk],
+        )
+
+    def test_reserve_products_retry_with_unavailable_product_fails(self):
+        reserved = self.create_product("A")
+        sold = self.create_product("B", status=ProductStatus.SOLD)
+        ReservationService.reserve_products([reserved], "cs_grown")
+
+        result = ReservationService.reserve_products([reserved, sold], "cs_grown")
+
+        self.assertFalse(result["success"])
+        self.assertIn(sold.pk, [p["id"] for p in result["unavailable_products"]])
+
+    def test_reserve_products_rolls_back_when_one_is_unavailable(self):
+        active = self.create_product("Active")
+        sold = self.create_product("Sold", status=ProductStatus.SOLD)
+
+        result = ReservationService.reserve_products([active, sold], "cs_partial")
+
+        self.assertFalse(result["success"])
+        self.assertEqual(
+            [(p["id"], p["reason"]) for p in result["unavailable_products"]],
+            [(sold.pk, ProductStatus.SOLD)],
+        )
+        active.refresh_from_db()
+        self.assertEqual(active.status, ProductStatus.ACTIVE)
+        self.assertFalse(
+            Reservation.objects.filter(stripe_session_id="cs_partial").exists()
+        )
+
+    def test_product_locked_by_concurrent_checkout_is_reported_reserved(self):
+        product = self.create_product("Locked")
+
+        # Simulate SKIP LOCKED skipping a row another checkout holds
+        with mock.patch.object(
+            ReservationService, "_claim_active_products", return_value=set()
+        ):
+            result = ReservationService.reserve_products([product], "cs_locked")
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["unavailable_products"][0]["reason"], "reserved")
+
+    def test_cancel_expired_reservations(self):
+        expired_product = self.create_product("Expired", status=ProductStatus.RESERVED)
+        live_product = self.create_product("Live", status=ProductStatus.RESERVED)
+        expired = self.create_reservation(
+            "cs_expired", [expired_product], timedelta(minutes=-1)
+        )
+        live = self.create_reservation("cs_live", [live_product], timedelta(minutes=10))
+
+        result = ReservationService.cancel_expired_reservations()
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["cancelled"], 1)
+        self.assertEqual(result["released_products"], 1)
+        expired.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual(expired.status, ReservationStatus.EXPIRED)
+        self.assertEqual(live.status, ReservationStatus.PENDING)
+        self.assertEqual(
+            Product.objects.get(pk=expired_product.pk).status, ProductStatus.ACTIVE
+        )
+        self.assertEqual(
+            Product.objects.get(pk=live_product.pk).status, ProductStatus.RESERVED
+        )
+
+    def test_complete_reservation_returns_reserved_product_ids(self):
+        products = [
+            self.create_product(name, status=ProductStatus.RESERVED)
+            for name in ("A", "B")
+        ]
+        self.create_reservation("cs_complete", products, timedelta(minutes=10))
+
+        result = ReservationService.complete_reservation("cs_complete")
+
+        self.assertTrue(result["success"])
+        self.assertCountEqual(result["product_ids"], [p.pk for p in products])
+        self.assertEqual(result["reservation"].status, ReservationStatus.COMPLETED)
+
+    def test_check_product_availability_uses_one_query(self):
+        active = self.create_product("Active")
+        sold = self.create_product("Sold", status=ProductStatus.SOLD)
+        missing_id = sold.pk + 1000
+
+        with self.assertNumQueries(1):
+            result = ReservationService.check_product_availability(
+                [active.pk, sold.pk, missing_id]
+            )
+
+        self.assertEqual(result["available"], [active.pk])
+        self.assertEqual(
+            [(item["id"], item["reason"]) for item in result["unavailable"]],
+            [(sold.pk, "sold"), (missing_id, "not_found")],
+        )
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ProductListCacheTests(TestCase):
+    """
+    Tests for caching of the product list endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name="Kolczyki", price=Decimal("100.00"))
+        self.url = reverse("products_api:product-list")
+
+    def names(self, response):
+        return [item["name"] for item in response.json()["results"]]
+
+    def test_second_request_is_served_from_cache(self):
+        self.client.get(self.url)
+
+        # Only the cache key aggregate runs
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(self.names(response), ["Kolczyki"])
+
+    def test_unknown_query_params_share_cache_entry(self):
+        self.client.get(self.url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"_": "12345", "status": "bogus"})
+
+        self.assertEqual(self.names(response), ["Kolczyki"])
+
+    def test_product_update_invalidates_cache(self):
+        self.client.get(self.url)
+
+        Product.objects.filter(pk=self.product.pk).update(
+            name="Broszka", updated_at=timezone.now() + timedelta(seconds=1)
+        )
+
+        self.assertEqual(self.names(self.client.get(self.url)), ["Broszka"])
+
+
+class ReserveBasketTests(TestCase):
+    """
+    Tests for the basket reservation endpoint.
+    """
+
+    @mock.patch("home.api.views.checkout.StripeSync.create_basket_checkout_session")
+    def test_stripe_failure_releases_reservation(self, create_session):
+        create_session.return_value = {"success": False, "error": "Stripe is down"}
+        product = Product.objects.create(name="Broszka", price=Decimal("100.00"))
+
+        response = self.client.post(
+            reverse("products_api:reserve_basket"),
+            {
+                "product_ids": [product.pk],
+                "success_url": "https://example.com/success",
+                "cancel_url": "https://example.com/cancel",
+            },
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 500)
+        product.refresh_from_db()
+        self.assertEqual(product.status, ProductStatus.ACTIVE)
+        self.assertEqual(
+            Reservation.objects.get(reserved_products__product=product).status,
+            ReservationStatus.EXPIRED,
+        )
+
+
+class StripeSyncTests(TestCase):
+    """
+    Tests for local product state changes made by StripeSync.
+    """
+
+    def test_price_to_grosze_is_exact(self):
+        self.assertEqual(StripeSync._price_to_grosze(Decimal("4.35")), 435)
+        self.assertEqual(StripeSync._price_to_grosze(Decimal("19.99")), 1999)
+
+    def test_mark_many_as_sold(self):
+        products = [
+            Product.objects.create(
+                name=name, price=Decimal("100.00"), status=ProductStatus.RESERVED
+            )
+            for name in ("Spinka", "Zawieszka")
+        ]
+
+        with self.assertNumQueries(1):
+            result = StripeSync.mark_many_as_sold(products)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["updated"], 2)
+        for product in Product.objects.filter(pk__in=[p.pk for p in products]):
+            self.assertEqual(product.status, ProductStatus.SOLD)
+            self.assertFalse(product.active)
+            self.assertIsNotNone(product.sold_at)
+
+
+@mock.patch("home.api.webhooks.WEBHOOK_SECRET", "whsec_test")
+class StripeWebhookTests(TestCase):
+    """
+    Tests for Stripe webhook routing.
+    """
+
+    def post_event(self, event):
+        payload = json.dumps(event)
+        timestamp = int(time.time())
+        signature = hmac.new(
+            b"whsec_test", f"{timestamp}.{payload}".encode(), hashlib.sha256
+        ).hexdigest()
+        return self.client.post(
+            "/api/webhooks/stripe/",
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=f"t={timestamp},v1={signature}",
+        )
+
+    @mock.patch("home.tasks.handle_checkout_completed")
+    def test_checkout_completed_is_processed_by_task(self, handle_checkout_completed):
+        session = {
+            "id": "cs_test",
+            "object": "checkout.session",
+            "metadata": {"product_id": "1"},
+        }
+
+        response = self.post_event(
+            {
+                "id": "evt_test",
+                "object": "event",
+                "type": "checkout.session.completed",
+                "data": {"object": session},
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        handle_checkout_completed.assert_called_once_with(session)
+
+    @mock.patch("home.api.stripe_webhooks_handlers.BrevoService")
+    @mock.patch("home.api.stripe_webhooks_handlers.FurgonetkaService")
+    def test_checkout_completed_calls_external_services_after_commit(
+        self, furgonetka, brevo
+    ):
+        product = Product.objects.create(
+            name="Spinka", price=Decimal("100.00"), status=ProductStatus.RESERVED
+        )
+        reservation = Reservation.objects.create(
+            stripe_session_id="cs_commit",
+            status=ReservationStatus.PENDING,
+            expires_at=timezone.now() + timedelta(minutes=10),
+        )
+        ReservedProduct.objects.create(reservation=reservation, product=product)
+        session = {
+            "id": "cs_commit",
+            "metadata": {},
+            "customer_details": {"email": "a@example.com"},
+        }
+        furgonetka.return_value.create_package_from_stripe_session.return_value = {
+            "id": "pkg_1",
+            "tracking_number": "TRK1",
+        }
+        brevo.return_value.send_order_email.return_value = {"success": True}
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            process_checkout_completed.call("evt_commit", session)
+
+        # Local writes are done, outbound calls wait for the commit
+        product.refresh_from_db()
+        self.assertEqual(product.status, ProductStatus.SOLD)
+        furgonetka.assert_not_called()
+        brevo.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        furgonetka.return_value.create_package_from_stripe_session.assert_called_once_with(
+            session
+        )
+        brevo.return_value.send_order_email.assert_called_once()
+
+    @mock.patch(
+        "home.tasks.handle_checkout_completed", side_effect=RuntimeError("boom")
+    )
+    def test_failed_checkout_completed_is_retried(self, handle_checkout_completed):
+        event = {
+            "id": "evt_failed",
+            "object": "event",
+            "type": "checkout.session.completed",
+            "data": {"object": {"id": "cs_failed", "object": "checkout.session"}},
+        }
+
+        first = self.post_event(event)
+        retry = self.post_event(event)
+
+        self.assertEqual(first.status_code, 500)
+        self.assertEqual(retry.status_code, 500)
+        self.assertEqual(handle_checkout_completed.call_count, 2)
+        self.assertFalse(
+            ProcessedStripeEvent.objects.filter(event_id="evt_failed").exists()
+        )
+
+    def test_prune_removes_only_old_events(self):
+        ProcessedStripeEvent.objects.create(
+            event_id="evt_old", event_type="coupon.updated"
+        )
+        ProcessedStripeEvent.objects.create(
+            event_id="evt_new", event_type="coupon.updated"
+        )
+        ProcessedStripeEvent.objects.filter(event_id="evt_old").update(
+            processed_at=timezone.now() - timedelta(days=31)
+        )
+
+        self.assertEqual(ProcessedStripeEvent.prune(), 1)
+        self.assertQuerySetEqual(
+            ProcessedStripeEvent.objects.values_list("event_id", flat=True), ["evt_new"]
+        )
+
+    @mock.patch("home.tasks.handle_checkout_expired")
+    def test_checkout_expired_is_processed_by_task(self, handle_checkout_expired):
+        response = self.post_event(
+            {
+                "id": "evt_expired",
+                "object": "event",
+                "type": "checkout.session.expired",
+                "data": {"object": {"id": "cs_expired", "object": "checkout.session"}},
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        handle_checkout_expired.assert_called_once_with("cs_expired")
+
+    @mock.patch("home.tasks.handle_checkout_expired", side_effect=RuntimeError("boom"))
+    def test_failed_checkout_expired_is_retried(self, handle_checkout_expired):
+        event = {
+            "id": "evt_expired_failed",
+            "object": "event",
+            "type": "checkout.session.expired",
+            "data": {
+                "object": {"id": "cs_expired_failed", "object": "checkout.session"}
+            },
+        }
+
+        first = self.post_event(event)
+        retry = self.post_event(event)
+
+        self.assertEqual(first.status_code, 500)
+        self.assertEqual(retry.status_code, 500)
+        self.assertEqual(handle_checkout_expired.call_count, 2)
+
+    @mock.patch("home.tasks.handle_checkout_expired")
+    def test_redelivered_event_is_processed_once(self, handle_checkout_expired):
+        event = {
+            "id": "evt_redelivered",
+            "object": "event",
+            "type": "checkout.session.expired",
+            "data": {"object": {"id": "cs_redelivered", "object": "checkout.session"}},
+        }
+
+        self.post_event(event)
+        response = self.post_event(event)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "duplicate")
+        handle_checkout_expired.assert_called_once_with("cs_redelivered")
+
+
+class CleanupExpiredReservationsTests(TestCase):
+    """
+    Tests for the expired reservation cleanup task and command.
+    """
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Zawieszka", price=Decimal("100.00"), status=ProductStatus.RESERVED
+        )
+        reservation = Reservation.objects.create(
+            stripe_session_id="cs_stale",
+            status=ReservationStatus.PENDING,
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        ReservedProduct.objects.create(reservation=reservation, product=self.product)
+
+    def test_expire_stale_reservations_task(self):
+        result = expire_stale_reservations.enqueue()
+
+        self.assertEqual(result.status, TaskResultStatus.SUCCESSFUL)
+        self.assertEqual(result.return_value["cancelled"], 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.status, ProductStatus.ACTIVE)
+
+    @mock.patch(
+        "home.management.commands.cleanup_expired_reservations.close_old_connections"
+    )
+    @mock.patch(
+        "home.management.commands.cleanup_expired_reservations.time.sleep",
+        side_effect=KeyboardInterrupt,
+    )
+    def test_interval_runs_cleanup_until_interrupted(
+        self, sleep, close_old_connections
+    ):
+        out = StringIO()
+
+        call_command("cleanup_expired_reservations", interval=60, stdout=out)
+
+        close_old_connections.assert_called_once_with()
+        sleep.assert_called_once_with(60)
+        self.assertIn("cancelled 1 expired reservation(s)", out.getvalue())
+
+
+class ProductIdsValidationTests(TestCase):
+    """
+    Tests for product_ids validation in basket request serializers.
+    """
+
+    def test_product_ids_are_deduplicated_in_order(self):
+        serializer = CheckAvailabilityRequestSerializer(
+            data={"product_ids": [3, 1, 3, 2, 1]}
+        )
+
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data["product_ids"], [3, 1, 2])
+
+    def test_too_many_product_ids_are_rejected(self):
+        serializer = CheckAvailabilityRequestSerializer(
+            data={"product_ids": list(range(1, MAX_PRODUCT_IDS + 2))}
+        )
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("product_ids", serializer.errors)
@@ -91,14 +91,14 @@ def products_api(request):
 
         if product.status == ProductStatus.RESERVED:
             # Check for active pending reservation that hasn't expired
-            active_reservation = product.reservations.filter(
+            expires_at = product.reservations.filter(
                 reservation__status=ReservationStatus.PENDING,
                 reservation__expires_at__gt=now
-            ).select_related('reservation').first()
+            ).values_list('reservation__expires_at', flat=True).first()
 
-            if active_reservation:
+            if expires_at:
                 is_reserved = True
-                reserved_until = active_reservation.reservation.expires_at.isoformat()
+                reserved_until = expires_at.isoformat()
 
         product_list.append({
             'id': product.id,
@@ -14,6 +14,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import permission_required, login_required
 from django.utils.decorators import method_decorator
 from django.db import models as db_models
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils.html import format_html, strip_tags
 from django.utils.safestring import mark_safe
@@ -63,6 +64,13 @@ class ProductViewSet(SnippetViewSet):
     list_filter = ["active", "created_at"]
     search_fields = ["tytul", "description", "nr_w_katalogu_zdjec"]
 
+    def get_queryset(self, request):
+        # Product rows are wide (descriptions, attribute arrays) - load only
+        # what the listing renders
+        return Product.objects.only(
+            "id", "name", "nr_w_katalogu_zdjec", "tytul", "price", "active", "featured", "created_at"
+        )
+
 
 class EventViewSet(SnippetViewSet):
     model = Event
@@ -74,6 +82,9 @@ class EventViewSet(SnippetViewSet):
     list_filter = ["active", "start_date"]
     search_fields = ["title", "location", "description"]
 
+    def get_queryset(self, request):
+        return Event.objects.only("id", "title", "location", "start_date", "end_date", "active")
+
 
 class ReservationViewSet(SnippetViewSet):
     model = Reservation
@@ -85,6 +96,11 @@ class ReservationViewSet(SnippetViewSet):
     list_filter = ["status", "reserved_at", "expires_at"]
     search_fields = ["stripe_session_id", "customer_email"]
 
+    def get_queryset(self, request):
+        return Reservation.objects.only(
+            "id", "stripe_session_id", "status", "reserved_at", "expires_at", "customer_email"
+        )
+
 
 class CouponViewSet(SnippetViewSet):
     model = Coupon
@@ -175,6 +191,12 @@ class TransactionViewSet(SnippetViewSet):
         ], heading="Status i śledzenie"),
     ]
 
+    def get_queryset(self, request):
+        # get_products_display lists product names for every row
+        return Transaction.objects.prefetch_related(
+            Prefetch('products', queryset=Product.objects.only('id', 'name', 'tytul'))
+        )
+
     def get_admin_urls(self):
         urls = super().get_admin_urls()
         urls += [
@@ -293,9 +315,13 @@ register_snippet(BrevoConfigViewSet)
 register_snippet(TransactionViewSet)
 
 
+# Built-in Wagtail menu items the shop admin doesn't use
+_HIDDEN_MENU_ITEMS = frozenset({'explorer', 'documents', 'snippets'})
+
+
 @hooks.register('construct_main_menu')
 def hide_menu_items(request, menu_items):
-    menu_items[:] = [item for item in menu_items if item.name not in ['explorer', 'documents', 'snippets']]
+    menu_items[:] = [item for item in menu_items if item.name not in _HIDDEN_MENU_ITEMS]
 
 
 @hooks.register('register_admin_urls')